@@ -1,17 +1,42 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from functools import lru_cache
+from operator import attrgetter
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
 from flask_login import login_required, current_user
-from extensions import db, bcrypt, login_manager, migrate
+from extensions import db, bcrypt, login_manager, migrate, cache
 from models import Article, User, ArticleReaction, Comment, Discussion, DiscussionComment 
 from routes.auth import auth_bp
 from routes.articles import articles_bp
+import json
 import os
+import re
+import string
+import traceback
+import uuid
+import requests
 from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import event, func, insert, make_url, or_, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
 
 load_dotenv()
 
 app = Flask(__name__)
 
+# skompilovane sablony sa ulozia na disk a zdielaju medzi workermi
+jinja_cache_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'jinja_cache')
+os.makedirs(jinja_cache_path, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory=jinja_cache_path)
+
 database_url = os.getenv("DATABASE_URL")
 if database_url:
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
@@ -21,17 +46,64 @@ else:
     db_path = os.path.join(instance_path, 'site.db')
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+_db_url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+# SQLite v pamati nepouziva QueuePool, velkost poolu sa nastavuje len pre suborovu alebo serverovu databazu
+if not (_db_url.get_backend_name() == "sqlite"
+        and (_db_url.database in (None, "", ":memory:") or _db_url.query.get("mode") == "memory")):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"].update({"pool_size": 10, "max_overflow": 20})
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = {"timeout": 30, "check_same_thread": False}
 app.config["SECRET_KEY"] = "change-this-secret-key"
+# cena bcrypt hashu; v produkcii 12, pre vyvoj/testy sa da znizit napr. na 4
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.getenv("BCRYPT_LOG_ROUNDS", "12"))
 
 app.config["GOOGLE_CLIENT_ID"] = os.getenv("GOOGLE_CLIENT_ID", "")
 app.config["GOOGLE_CLIENT_SECRET"] = os.getenv("GOOGLE_CLIENT_SECRET", "")
 
 app.config["GEMINI_API_KEY"] = os.getenv("GEMINI_API_KEY", "")
 
+# fetcher sa vytvori raz pri starte, nie pri kazdom POST /fetch_article
+try:
+    from utils.multi_source_fetcher import MultiSourceNewsFetcher
+    _fetcher = MultiSourceNewsFetcher(gemini_api_key=app.config["GEMINI_API_KEY"])
+except Exception as e:
+    print(f"Error importing multi_source_fetcher: {e}")
+    traceback.print_exc()
+    _fetcher = None
+
+# SimpleCache je samostatna v kazdom procese: cache.clear() po ulozeni clanku vycisti len ten worker,
+# ostatne mozu este do CACHE_DEFAULT_TIMEOUT vracat stare data. Pri viacerych workeroch nastavit
+# zdielany backend, napr. CACHE_TYPE=FileSystemCache (adresar instance/cache).
+app.config["CACHE_TYPE"] = os.getenv("CACHE_TYPE", "SimpleCache")
+app.config["CACHE_DIR"] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'cache')
+app.config["CACHE_DEFAULT_TIMEOUT"] = 60
+
 db.init_app(app)
 bcrypt.init_app(app)
 login_manager.init_app(app)
 migrate.init_app(app, db)
+cache.init_app(app)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Nastaví WAL režim a ďalšie PRAGMA, aby čitatelia neblokovali zápis a commit nerobil zbytočné fsync."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    with app.app_context():
+        event.listen(db.engine, "connect", _set_sqlite_pragmas)
 
 app.register_blueprint(auth_bp)
 app.register_blueprint(articles_bp)
@@ -39,255 +111,411 @@ app.register_blueprint(articles_bp)
 from routes.auth import init_oauth
 init_oauth(app)
 
+# FTS5 tabulka s externym obsahom z article; triggery ju aktualizuju pri kazdom zapise
+ARTICLE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5("
+    "title, summary, content, content='article', content_rowid='id', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS article_fts_ai AFTER INSERT ON article BEGIN "
+    "INSERT INTO article_fts(rowid, title, summary, content) VALUES (new.id, new.title, new.summary, new.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS article_fts_ad AFTER DELETE ON article BEGIN "
+    "INSERT INTO article_fts(article_fts, rowid, title, summary, content) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS article_fts_au AFTER UPDATE OF title, summary, content ON article BEGIN "
+    "INSERT INTO article_fts(article_fts, rowid, title, summary, content) "
+    "VALUES ('delete', old.id, old.title, old.summary, old.content); "
+    "INSERT INTO article_fts(rowid, title, summary, content) VALUES (new.id, new.title, new.summary, new.content); "
+    "END",
+]
+
+# triggery, ktore drzia article.like_count v sulade s article_reaction
+LIKE_COUNT_TRIGGERS_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS article_reaction_like_ai AFTER INSERT ON article_reaction "
+    "WHEN NEW.liked = 1 BEGIN "
+    "UPDATE article SET like_count = like_count + 1 WHERE id = NEW.article_id; "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS article_reaction_like_ad AFTER DELETE ON article_reaction "
+    "WHEN OLD.liked = 1 BEGIN "
+    "UPDATE article SET like_count = like_count - 1 WHERE id = OLD.article_id; "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS article_reaction_like_au AFTER UPDATE OF liked ON article_reaction "
+    "WHEN NEW.liked != OLD.liked BEGIN "
+    "UPDATE article SET like_count = like_count + (CASE WHEN NEW.liked = 1 THEN 1 ELSE -1 END) "
+    "WHERE id = NEW.article_id; "
+    "END",
+]
+
+# Pri každej zmene _ensure_* funkcií zvýšiť, aby sa kontroly pri ďalšom štarte znova spustili.
+_SCHEMA_VERSION = "10"
+
 with app.app_context():
     from sqlalchemy import text as _sql_text
 
-    def _ensure_article_columns():
-        """Zabezpečí, že tabuľka article má všetky potrebné stĺpce pre multi-source články."""
+    def _missing_columns(conn, table: str, wanted: dict) -> list:
+        """Vráti ALTER príkazy pre stĺpce z ``wanted``, ktoré tabuľke ešte chýbajú (jeden PRAGMA na tabuľku).
+        Ak tabuľka ešte neexistuje, vráti prázdny zoznam, vytvorí ju create_all."""
+        existing = {c[1] for c in conn.execute(_sql_text(f"PRAGMA table_info('{table}');")).fetchall()}
+        if not existing:
+            return []
+        return [
+            f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"
+            for name, ddl in wanted.items()
+            if name not in existing
+        ]
+
+    def _ensure_columns():
+        """Doplní chýbajúce stĺpce všetkých tabuliek v jednej transakcii, teda s jediným commitom (fsync) namiesto commitu po každej tabuľke.
+        Vráti True, ak sa všetko podarilo."""
         try:
-            cols = db.session.execute(_sql_text("PRAGMA table_info('article');")).fetchall()
-            existing = {c[1] for c in cols}
-            alter_statements = []
-            if 'summary' not in existing:
-                alter_statements.append("ALTER TABLE article ADD COLUMN summary TEXT")
-            if 'photo' not in existing:
-                alter_statements.append("ALTER TABLE article ADD COLUMN photo VARCHAR(500)")
-            if 'source_url' not in existing:
-                alter_statements.append("ALTER TABLE article ADD COLUMN source_url VARCHAR(500)")
-            if 'latitude' not in existing:
-                alter_statements.append("ALTER TABLE article ADD COLUMN latitude REAL")
-            if 'longitude' not in existing:
-                alter_statements.append("ALTER TABLE article ADD COLUMN longitude REAL")
-            if 'location_name' not in existing:
-                alter_statements.append("ALTER TABLE article ADD COLUMN location_name VARCHAR(200)")
-            for stmt in alter_statements:
-                db.session.execute(_sql_text(stmt))
-            if alter_statements:
-                db.session.commit()
-        except Exception:
-            pass
+            with db.engine.begin() as conn:
+                _ensure_article_columns(conn)
+                _ensure_user_columns(conn)
+                _ensure_comment_columns(conn)
+                _ensure_discussion_comment_columns(conn)
+            return True
+        except Exception as e:
+            print(f"Error ensuring columns: {e}")
+            return False
 
-    def _ensure_comment_columns():
+    def _ensure_article_columns(conn):
+        """Zabezpečí, že tabuľka article má všetky potrebné stĺpce pre multi-source články."""
+        alter_statements = _missing_columns(conn, "article", {
+            "summary": "TEXT",
+            "photo": "VARCHAR(500)",
+            "source_url": "VARCHAR(500)",
+            "latitude": "REAL",
+            "longitude": "REAL",
+            "location_name": "VARCHAR(200)",
+            "like_count": "INTEGER NOT NULL DEFAULT 0",
+            "preview": "VARCHAR(203)",
+        })
+        if any(" like_count " in stmt for stmt in alter_statements):
+            alter_statements.append(
+                "UPDATE article SET like_count = "
+                "(SELECT COUNT(*) FROM article_reaction r WHERE r.article_id = article.id AND r.liked = 1)"
+            )
+        for stmt in alter_statements:
+            conn.execute(_sql_text(stmt))
+        if any(" preview " in stmt for stmt in alter_statements):
+            rows = conn.execute(_sql_text("SELECT id, summary, content FROM article")).fetchall()
+            if rows:
+                conn.execute(
+                    _sql_text("UPDATE article SET preview = :preview WHERE id = :id"),
+                    [{"id": row[0], "preview": Article.build_preview(row[1], row[2])} for row in rows]
+                )
+
+    def _ensure_comment_columns(conn):
         """Zabezpečí, že tabuľka comment má stĺpec parent_id pre vnorené komentáre."""
-        try:
-            cols = db.session.execute(_sql_text("PRAGMA table_info('comment');")).fetchall()
-            existing = {c[1] for c in cols}
-            if 'parent_id' not in existing:
-                db.session.execute(_sql_text("ALTER TABLE comment ADD COLUMN parent_id INTEGER"))
-                db.session.commit()
-        except Exception:
-            pass
+        for stmt in _missing_columns(conn, "comment", {"parent_id": "INTEGER"}):
+            conn.execute(_sql_text(stmt))
 
-    def _ensure_discussion_comment_columns():
+    def _ensure_discussion_comment_columns(conn):
         """Zabezpečí, že tabuľka discussion_comment má stĺpec parent_id pre vnorené komentáre v diskusiách."""
-        try:
-            cols = db.session.execute(_sql_text("PRAGMA table_info('discussion_comment');")).fetchall()
-            existing = {c[1] for c in cols}
-            if 'parent_id' not in existing:
-                db.session.execute(_sql_text("ALTER TABLE discussion_comment ADD COLUMN parent_id INTEGER"))
-                
-                
-                db.session.commit()
-        except Exception:
-            pass
+        for stmt in _missing_columns(conn, "discussion_comment", {"parent_id": "INTEGER"}):
+            conn.execute(_sql_text(stmt))
 
-    def _ensure_user_columns():
+    def _ensure_user_columns(conn):
         """Zabezpečí, že tabuľka user má potrebné stĺpce pre OAuth a profilové obrázky, vrátane konverzie password_hash na nullable."""
-        try:
-            cols = db.session.execute(_sql_text("PRAGMA table_info('user');")).fetchall()
-            existing = {c[1] for c in cols}
-            if 'profile_image' not in existing:
-                db.session.execute(_sql_text("ALTER TABLE user ADD COLUMN profile_image VARCHAR(500)"))
-                db.session.commit()
-            if 'google_id' not in existing:
-                db.session.execute(_sql_text("ALTER TABLE user ADD COLUMN google_id VARCHAR(255)"))
-                db.session.commit()
-            
-            
-            password_hash_not_null = False
-            for col in cols:
-                if col[1] == 'password_hash' and col[3] == 0:  
-                    password_hash_not_null = True
-                    break
-            
-            if password_hash_not_null:
-                print("Converting password_hash to nullable for OAuth support...")
-                db.session.execute(_sql_text("""
-                    CREATE TABLE user_new (
-                        id INTEGER NOT NULL PRIMARY KEY,
-                        username VARCHAR(80) NOT NULL UNIQUE,
-                        email VARCHAR(120) NOT NULL UNIQUE,
-                        password_hash TEXT,
-                        google_id TEXT,
-                        is_admin BOOLEAN NOT NULL,
-                        date_created DATETIME NOT NULL,
-                        profile_image TEXT
-                    )
-                """))
-                db.session.execute(_sql_text("""
-                    INSERT INTO user_new (id, username, email, password_hash, google_id, is_admin, date_created, profile_image)
-                    SELECT id, username, email, password_hash, google_id, is_admin, date_created, profile_image
-                    FROM user
-                """))
-                db.session.execute(_sql_text("DROP TABLE user"))
-                db.session.execute(_sql_text("ALTER TABLE user_new RENAME TO user"))
+        cols = conn.execute(_sql_text("PRAGMA table_info('user');")).fetchall()
+        for stmt in _missing_columns(conn, "user", {
+            "profile_image": "VARCHAR(500)",
+            "google_id": "VARCHAR(255)",
+        }):
+            conn.execute(_sql_text(stmt))
+
+        # PRAGMA table_info: stlpec 3 (notnull) je 1, ak ma stlpec NOT NULL
+        password_hash_not_null = any(col[1] == 'password_hash' and col[3] == 1 for col in cols)
+
+        if password_hash_not_null:
+            print("Converting password_hash to nullable for OAuth support...")
+            conn.execute(_sql_text("""
+                CREATE TABLE user_new (
+                    id INTEGER NOT NULL PRIMARY KEY,
+                    username VARCHAR(80) NOT NULL UNIQUE,
+                    email VARCHAR(120) NOT NULL UNIQUE,
+                    password_hash TEXT,
+                    google_id TEXT,
+                    is_admin BOOLEAN NOT NULL,
+                    date_created DATETIME NOT NULL,
+                    profile_image TEXT
+                )
+            """))
+            conn.execute(_sql_text("""
+                INSERT INTO user_new (id, username, email, password_hash, google_id, is_admin, date_created, profile_image)
+                SELECT id, username, email, password_hash, google_id, is_admin, date_created, profile_image
+                FROM user
+            """))
+            conn.execute(_sql_text("DROP TABLE user"))
+            conn.execute(_sql_text("ALTER TABLE user_new RENAME TO user"))
+            print("password_hash is now nullable")
+
+    def _ensure_indexes():
+        """Zabezpečí indexy pre zoradenie, mapu, počítanie likov, reakcie používateľa, komentáre a deduplikáciu článkov aj v starších databázach.
+        Každý index sa vytvára samostatne, aby duplicitné staré dáta nezablokovali ostatné.
+        Vráti False pri prechodnej chybe, aby sa verzia schémy nezapísala a pokus sa zopakoval pri ďalšom štarte.
+        Unikátny index, ktorý nejde vytvoriť pre duplicitné staré dáta, sa len zaloguje; opakovanie by nepomohlo
+        a duplicitám pri ukladaní bráni aj kontrola nadpisu vo _fetch_and_store_article."""
+        ok = True
+        statements = [
+            "CREATE INDEX IF NOT EXISTS ix_article_date_posted_desc ON article (date_posted DESC)",
+            "CREATE INDEX IF NOT EXISTS ix_reaction_article_liked ON article_reaction (article_id, liked)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_article_title ON article (title)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_article_source_url ON article (source_url) "
+            "WHERE source_url IS NOT NULL AND source_url != ''",
+            "CREATE INDEX IF NOT EXISTS ix_ar_user_article ON article_reaction (user_id, article_id)",
+            "CREATE INDEX IF NOT EXISTS ix_comment_article_date ON comment (article_id, date_posted)",
+            "CREATE INDEX IF NOT EXISTS ix_article_map ON article (date_posted DESC) "
+            "WHERE latitude IS NOT NULL AND longitude IS NOT NULL",
+        ]
+        for stmt in statements:
+            try:
+                db.session.execute(_sql_text(stmt))
                 db.session.commit()
-                print("password_hash is now nullable")
+            except IntegrityError as e:
+                # duplicitne data v starsej databaze, pri dalsom starte by index zlyhal rovnako
+                print(f"Warning: unique index not created because of duplicate rows: {e}")
+                db.session.rollback()
+            except Exception as e:
+                print(f"Error creating index: {e}")
+                db.session.rollback()
+                ok = False
+        try:
+            # statistiky pre planovac, aby nove indexy skutocne pouzival
+            db.session.execute(_sql_text("ANALYZE"))
+            db.session.commit()
         except Exception as e:
-            print(f"Error ensuring user columns: {e}")
+            print(f"Error analyzing database: {e}")
             db.session.rollback()
+        return ok
 
-    try:
-        from flask_migrate import upgrade as _upgrade
+    def _ensure_article_fts():
+        """Zabezpečí FTS5 index nad nadpisom, zhrnutím a obsahom článkov spolu s triggermi, ktoré ho držia v súlade s tabuľkou article."""
+        try:
+            fts_exists = db.session.execute(
+                _sql_text("SELECT name FROM sqlite_master WHERE type='table' AND name='article_fts';")
+            ).first()
+            for stmt in ARTICLE_FTS_DDL:
+                db.session.execute(_sql_text(stmt))
+            if not fts_exists:
+                db.session.execute(_sql_text("INSERT INTO article_fts(article_fts) VALUES('rebuild')"))
+            db.session.commit()
+            return True
+        except Exception as e:
+            print(f"Error ensuring article_fts: {e}")
+            db.session.rollback()
+            return False
 
-        result = db.session.execute(
-            _sql_text("SELECT name FROM sqlite_master WHERE type='table' AND name='article';")
-        ).first()
-        if not result:
-            _upgrade()
-            
-            _ensure_article_columns()
-            _ensure_user_columns()
-        else:
-            _ensure_article_columns()
-            _ensure_user_columns()
-            _ensure_comment_columns()
-            _ensure_discussion_comment_columns()
-    except Exception:
+    def _ensure_like_count_triggers():
+        """Zabezpečí triggery, ktoré pri každej zmene reakcie upravia article.like_count, a raz prepočíta počty likov."""
         try:
-            from flask_migrate import upgrade as _upgrade_fallback
-            _upgrade_fallback()
-            _ensure_article_columns()
-            _ensure_user_columns()
-            _ensure_comment_columns()
-            _ensure_discussion_comment_columns()
+            triggers_exist = db.session.execute(
+                _sql_text("SELECT name FROM sqlite_master WHERE type='trigger' AND name='article_reaction_like_ai';")
+            ).first()
+            for stmt in LIKE_COUNT_TRIGGERS_DDL:
+                db.session.execute(_sql_text(stmt))
+            if not triggers_exist:
+                db.session.execute(_sql_text(
+                    "UPDATE article SET like_count = "
+                    "(SELECT COUNT(*) FROM article_reaction r WHERE r.article_id = article.id AND r.liked = 1)"
+                ))
+            db.session.commit()
+            return True
+        except Exception as e:
+            print(f"Error ensuring like_count triggers: {e}")
+            db.session.rollback()
+            return False
+
+    def _schema_is_current() -> bool:
+        """Zistí z tabuľky app_meta, či bola schéma v tejto verzii overená už pri predchádzajúcom štarte."""
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    _sql_text("SELECT value FROM app_meta WHERE key = 'schema_version'")
+                ).first()
+            return row is not None and row[0] == _SCHEMA_VERSION
         except Exception:
-            db.create_all()
-            _ensure_article_columns()
-            _ensure_user_columns()
-            _ensure_comment_columns()
-            _ensure_discussion_comment_columns()
+            return False
 
-    
-    db.create_all()
+    def _mark_schema_current():
+        """Zapíše verziu schémy do app_meta, aby ďalší štart preskočil PRAGMA kontroly."""
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(_sql_text("CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value TEXT)"))
+                conn.execute(
+                    _sql_text("INSERT OR REPLACE INTO app_meta (key, value) VALUES ('schema_version', :version)"),
+                    {"version": _SCHEMA_VERSION},
+                )
+        except Exception as e:
+            print(f"Error storing schema version: {e}")
+
+    if not _schema_is_current():
+        try:
+            from flask_migrate import upgrade as _upgrade
+
+            result = db.session.execute(
+                _sql_text("SELECT name FROM sqlite_master WHERE type='table' AND name='article';")
+            ).first()
+            if not result:
+                _upgrade()
+            columns_ok = _ensure_columns()
+        except Exception:
+            try:
+                from flask_migrate import upgrade as _upgrade_fallback
+                _upgrade_fallback()
+                columns_ok = _ensure_columns()
+            except Exception:
+                db.create_all()
+                columns_ok = _ensure_columns()
+
+        db.create_all()
+        # kazdy krok sa spusti vzdy; verzia sa zapise, len ak vsetky prebehli bez chyby
+        steps_ok = [columns_ok, _ensure_indexes(), _ensure_article_fts(), _ensure_like_count_triggers()]
+        if all(steps_ok):
+            _mark_schema_current()
+        else:
+            print("Schema upgrade incomplete, it will be retried on next start.")
+
+    try:
+        _article_fts_enabled = db.session.execute(
+            _sql_text("SELECT name FROM sqlite_master WHERE type='table' AND name='article_fts';")
+        ).first() is not None
+    except Exception:
+        db.session.rollback()
+        _article_fts_enabled = False
 
 @app.get("/")
 def index():
     return redirect(url_for("list_articles"))
 
-def extract_location_with_gemini(title: str, content: str, summary: str = "") -> dict:
-    """Zistí miesto súvisiace s článkom pomocou Gemini API,Skúsi vyextrahovať primárnu geografickú lokalitu z textu článku."""
-    #kontrola API kľúča
-    gemini_key = app.config.get("GEMINI_API_KEY", "")
-    if not gemini_key:
-        return {"latitude": None, "longitude": None, "location_name": None}
-    # ijnicializacia gemini 
-    try:
-        import google.generativeai as genai
-        genai.configure(api_key=gemini_key)
-        
-        model = None
-        for model_name in ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-2.5-pro', 'gemini-1.5-flash']:
-            try:
-                model = genai.GenerativeModel(model_name)
-                break
-            except:
-                continue
-        
-        if not model:
-            return {"latitude": None, "longitude": None, "location_name": None}
-        #priprava textu clanku
-        article_text = f"Title: {title}\n\n"
-        if summary:
-            article_text += f"Summary: {summary}\n\n"
-        article_text += f"Content: {content[:2000]}"  
-        #prompt
-        prompt = f"""Analyze this news article and determine the primary geographic location where the event occurred or is most relevant.
-
-{article_text}
+# staticka cast promptu pre urcenie polohy, pri volani sa doplni len text clanku
+_LOCATION_PROMPT = string.Template("""Analyze this news article and determine the primary geographic location where the event occurred or is most relevant.
+
+${article_text}
 
 Instructions:
 - Identify the primary location (city, region, country) where this event took place or is most relevant
 - If multiple locations are mentioned, choose the most important one
 - If no specific location can be determined, return "null" for all fields
 - Return ONLY a JSON object in this exact format (no other text):
-{{
+{
   "location_name": "City, Country" or null,
   "latitude": number or null,
   "longitude": number or null
-}}
+}
 
 If you cannot determine a location, return:
-{{
+{
   "location_name": null,
   "latitude": null,
   "longitude": null
-}}
+}
 
-JSON response:"""
+JSON response:""")
 
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        #Spracovanie odpovede 
-        import json
-        import re
-        
-        response_text = re.sub(r'```json\s*', '', response_text)
-        response_text = re.sub(r'```\s*', '', response_text)
-        response_text = response_text.strip()
-        
-        try:
-            location_data = json.loads(response_text)
-            return {
-                "latitude": location_data.get("latitude"),
-                "longitude": location_data.get("longitude"),
-                "location_name": location_data.get("location_name")
-            }
-        # Fallback parsing (ak JSON zlyha lebo nemame suradnice iba nazov)
-        except json.JSONDecodeError:
-            location_name_match = re.search(r'"location_name":\s*"([^"]+)"', response_text)
-            if location_name_match:
-                return {
-                    "latitude": None,
-                    "longitude": None,
-                    "location_name": location_name_match.group(1)
-                }
-            return {"latitude": None, "longitude": None, "location_name": None}
-            #Regex sa pokúša nájsť vzor "location_name": "..." a extrahovať len text z úvodzoviek.
+_JSON_FENCE_RE = re.compile(r"```(?:json)?\s*", re.IGNORECASE)
+_LOCATION_NAME_RE = re.compile(r'"location_name"\s*:\s*"([^"]+)"')
+
+# Gemini model sa vytvori raz pri prvom pouziti a potom sa zdiela
+_gemini_model = None
+
+
+def _get_gemini_model():
+    """Vráti zdieľaný Gemini model, pri prvom volaní ho nakonfiguruje."""
+    global _gemini_model
+    if _gemini_model is None:
+        if genai is None:
+            raise RuntimeError("google-generativeai is not installed")
+        genai.configure(api_key=app.config["GEMINI_API_KEY"])
+        _gemini_model = genai.GenerativeModel(os.getenv("GEMINI_MODEL", "gemini-2.5-flash"))
+    return _gemini_model
+
+
+def extract_location_with_gemini(title: str, content: str, summary: str = "") -> dict:
+    """Zistí miesto súvisiace s článkom pomocou Gemini API,Skúsi vyextrahovať primárnu geografickú lokalitu z textu článku."""
+    #kontrola API kľúča
+    if not app.config.get("GEMINI_API_KEY", ""):
+        return {"latitude": None, "longitude": None, "location_name": None}
+    try:
+        latitude, longitude, location_name = _locate_article(title, content[:2000], summary)
     except Exception as e:
         print(f"Error extracting location with Gemini: {e}")
         return {"latitude": None, "longitude": None, "location_name": None}
+    return {"latitude": latitude, "longitude": longitude, "location_name": location_name}
+
+
+@lru_cache(maxsize=512)
+def _locate_article(title: str, content: str, summary: str) -> tuple:
+    """Opýta sa Gemini na polohu článku a vráti (latitude, longitude, location_name).
+    Výsledky sa pamätajú podľa textu článku, chyby API sa nepamätajú a prebublajú volajúcemu."""
+    model = _get_gemini_model()
+    #priprava textu clanku
+    article_text = f"Title: {title}\n\n"
+    if summary:
+        article_text += f"Summary: {summary}\n\n"
+    # obsah je uz skrateny na 2000 znakov pri volani, co obmedzuje aj kluc lru_cache
+    article_text += f"Content: {content}"
+    #prompt
+    prompt = _LOCATION_PROMPT.substitute(article_text=article_text)
+
+    response = model.generate_content(prompt)
+    #Spracovanie odpovede, markdown bloky ```json ... ``` sa odstrania
+    response_text = _JSON_FENCE_RE.sub("", response.text).strip()
+    
+    try:
+        location_data = json.loads(response_text)
+    # Fallback parsing (ak JSON zlyha lebo nemame suradnice iba nazov)
+    except json.JSONDecodeError:
+        #Regex sa pokúša nájsť vzor "location_name": "..." a extrahovať len text z úvodzoviek.
+        location_name_match = _LOCATION_NAME_RE.search(response_text)
+        if location_name_match:
+            return (None, None, location_name_match.group(1))
+        return (None, None, None)
+    if not isinstance(location_data, dict):
+        return (None, None, None)
+    return (
+        location_data.get("latitude"),
+        location_data.get("longitude"),
+        location_data.get("location_name")
+    )
+
+
+# jedna HTTP session pre Nominatim, keep-alive spojenie sa pouzije znova pri dalsom geokodovani
+_nominatim_session = requests.Session()
+_nominatim_session.headers.update({"User-Agent": "BezFiltraNewsApp/1.0"})# user agent pre nominatim
 
 
 def geocode_location(location_name: str) -> dict:
-    """Prekonvertuje názov lokality na súradnice pomocou Nominatim (OpenStreetMap) získa zemepisnu šírku a dĺžku."""
+    """Prekonvertuje názov lokality na súradnice pomocou Nominatim (OpenStreetMap) získa zemepisnu šírku a dĺžku.
+    Rovnaké názvy (bez ohľadu na veľkosť písmen a medzery) sa geokódujú len raz za beh procesu."""
     if not location_name:
         return {"latitude": None, "longitude": None}
-    # Príprava requestu na Nominatim
     try:
-        import requests
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            "q": location_name,
-            "format": "json",
-            "limit": 1
-        }
-        headers = {
-            "User-Agent": "BezFiltraNewsApp/1.0"# user agent pre nominatim
-        }
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        #Spracovanie odpovede
-        if response.status_code == 200:
-            data = response.json()
-            if data and len(data) > 0:
-                return {
-                    "latitude": float(data[0]["lat"]),
-                    "longitude": float(data[0]["lon"])
-                }
+        latitude, longitude = _geocode_cached(" ".join(location_name.split()).casefold())
     except Exception as e:
         print(f"Error geocoding location: {e}")
-    
-    return {"latitude": None, "longitude": None}
+        return {"latitude": None, "longitude": None}
+    return {"latitude": latitude, "longitude": longitude}
+
+
+@lru_cache(maxsize=2048)
+def _geocode_cached(location_name: str) -> tuple:
+    """Opýta sa Nominatim na súradnice a vráti (latitude, longitude).
+    Chybné odpovede (napr. 429) vyhodia výnimku, aby sa v cache nezapamätali."""
+    # Príprava requestu na Nominatim
+    url = "https://nominatim.openstreetmap.org/search"
+    params = {
+        "q": location_name,
+        "format": "json",
+        "limit": 1
+    }
+    response = _nominatim_session.get(url, params=params, timeout=5)
+    response.raise_for_status()
+    #Spracovanie odpovede
+    data = response.json()
+    if data:
+        return (float(data[0]["lat"]), float(data[0]["lon"]))
+    return (None, None)
 
 
 @app.get("/map")
@@ -295,16 +523,41 @@ def map():
     return render_template("map.html")
 
 
+MAP_ARTICLES_CACHE_KEY = "api/articles/with-location"
+
+
 @app.get("/api/articles/with-location")
 def get_articles_with_location():
-    """API endpoint na získanie článkov s polohou pre mapu,JSON so zoznamom článkov, ktoré majú súradnice"""
+    """API endpoint na získanie článkov s polohou pre mapu,JSON so zoznamom článkov, ktoré majú súradnice.
+    Hotové JSON telo aj jeho ETag sa držia 60 s v cache (uloženie článku cache vyčistí),
+    opakované požiadavky s ``If-None-Match`` dostanú 304 bez tela."""
+    cached = cache.get(MAP_ARTICLES_CACHE_KEY)
+    if cached is None:
+        response = _build_articles_with_location()
+        response.add_etag()
+        cached = (response.get_data(), response.get_etag()[0])
+        cache.set(MAP_ARTICLES_CACHE_KEY, cached, timeout=60)
+
+    body, etag = cached
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def _build_articles_with_location():
+    """Zostaví JSON odpoveď so (najviac 100) najnovšími článkami, ktoré majú súradnice."""
     # ZAKOMENTOVANE: Filtrovanie len poslednych 24 hodin (pre DEBUG - aby videl stare clanky)
     # Povodny kod na vratenie na 24 hodin:
     # cutoff_time = datetime.now(timezone.utc) - timedelta(hours=24) # cas po ktorom sa clanky vymazu
     # a do .filter() pridat: Article.date_posted >= cutoff_time
     
-    #kriteria pre nacitanie clanku na mapu
-    articles = Article.query.filter(
+    #kriteria pre nacitanie clanku na mapu; nahlad je ulozeny pri vlozeni, obsah sa nenacitava
+    articles = Article.query.options(
+        load_only(
+            Article.id, Article.title, Article.latitude, Article.longitude,
+            Article.location_name, Article.preview, Article.photo, Article.date_posted
+        )
+    ).filter(
         Article.latitude.isnot(None),
         Article.longitude.isnot(None)
         # Article.date_posted >= cutoff_time  # ZAKOMENTOVANE - vidis vsetky clanky s polohou
@@ -312,78 +565,120 @@ def get_articles_with_location():
     
     articles_data = []
     for article in articles:
-        sources_data = article.get_sources()
-        preview_text = article.summary or ""
-        if not preview_text and sources_data and 'bullets' in sources_data:
-            preview_text = sources_data['bullets'][0][:200] if sources_data['bullets'] else ""
-        
         articles_data.append({
             "id": article.id,
             "title": article.title,
             "latitude": article.latitude,
             "longitude": article.longitude,
             "location_name": article.location_name,
-            "preview": preview_text[:200] + "..." if len(preview_text) > 200 else preview_text,
+            "preview": article.preview or "",
             "photo": article.cover_image_url(300, 200),
-            "date_posted": article.date_posted.strftime('%Y-%m-%d %H:%M')
+            "date_posted": article.date_posted.isoformat(timespec="minutes")
         })
     
     return jsonify(articles_data)
 
 
+ARTICLES_PER_PAGE = 20
+
+
+def _article_text_matches(term: str):
+    """Vráti SQL podmienku, ktorá hľadá výraz v nadpise, zhrnutí alebo obsahu článku bez ohľadu na veľkosť písmen."""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    pattern = f"%{escaped}%"
+    return or_(
+        func.lower(Article.title).like(pattern, escape="\\"),
+        func.lower(func.coalesce(Article.summary, "")).like(pattern, escape="\\"),
+        func.lower(Article.content).like(pattern, escape="\\"),
+    )
+
+
+def _fts_match_query(term: str) -> str:
+    """Prevedie hľadaný text na bezpečný FTS5 MATCH výraz, kde každé slovo je prefix v úvodzovkách."""
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", term))
+
+
+def _list_cache_key() -> str:
+    """Kľúč cache pre zoznam článkov podľa filtra, hľadania a strany."""
+    return f"articles/anon{request.full_path}"
+
+
+def _skip_list_cache() -> bool:
+    """Necachuje stránku s jednorazovými flash správami ani stránku prihláseného používateľa.
+    Stav jeho likov sa mení pri každom kliknutí a cache je v každom workeri samostatná."""
+    return current_user.is_authenticated or bool(session.get("_flashes"))
+
+
 @app.get("/articles")
+@cache.cached(timeout=60, key_prefix=_list_cache_key, unless=_skip_list_cache)
 def list_articles():
     """Načítava člannky z databazy."""
     filter_keyword = request.args.get('filter', '').lower()
     search_query = request.args.get('search', '').strip().lower()
-    
-    articles = Article.query.order_by(Article.date_posted.desc()).all()
-    
-    
+    before_raw = request.args.get('before', '').strip()
+    before_id = request.args.get('before_id', type=int)
+
+    # keyset strankovanie podla (date_posted, id): clanky s rovnakym casom sa na hranici strany nestratia
+    query = Article.query.options(selectinload(Article.author)).order_by(Article.date_posted.desc(), Article.id.desc())
+    if before_raw:
+        try:
+            before = datetime.fromisoformat(before_raw)
+        except ValueError:
+            before = None
+        if before is not None and before_id is not None:
+            query = query.filter(tuple_(Article.date_posted, Article.id) < tuple_(before, before_id))
+        elif before is not None:
+            query = query.filter(Article.date_posted < before)
+
     if search_query:
-        filtered_articles = []
-        for article in articles:
-            title_lower = article.title.lower()
-            summary_lower = (article.summary or '').lower()
-            content_lower = article.content.lower()
-            combined_text = f"{title_lower} {summary_lower} {content_lower}"
-            
-            if search_query in combined_text:
-                filtered_articles.append(article)
-        articles = filtered_articles
-    
-    
+        fts_query = _fts_match_query(search_query) if _article_fts_enabled else ""
+        if fts_query:
+            matching_ids = _sql_text(
+                "SELECT rowid FROM article_fts WHERE article_fts MATCH :q"
+            ).bindparams(q=fts_query).columns(rowid=db.Integer)
+            query = query.filter(Article.id.in_(matching_ids))
+        else:
+            query = query.filter(_article_text_matches(search_query))
     if filter_keyword:
-        filtered_articles = []
-        for article in articles:
-            title_lower = article.title.lower()
-            summary_lower = (article.summary or '').lower()
-            content_lower = article.content.lower()
-            combined_text = f"{title_lower} {summary_lower} {content_lower}"
-            
-            if filter_keyword in combined_text:
-                filtered_articles.append(article)
-        articles = filtered_articles
+        query = query.filter(_article_text_matches(filter_keyword))
+
+    # karta clanku potrebuje len tieto stlpce; obsah (JSON so zdrojmi) sa nacita, len ak chyba summary
+    articles = query.options(load_only(
+        Article.id, Article.title, Article.summary, Article.photo, Article.source_url,
+        Article.date_posted, Article.user_id, Article.like_count
+    )).limit(ARTICLES_PER_PAGE).all()
+
+    next_before = next_before_id = None
+    if len(articles) == ARTICLES_PER_PAGE:
+        next_before = articles[-1].date_posted.isoformat()
+        next_before_id = articles[-1].id
     
     user_reactions = {}
-    if current_user.is_authenticated:
-        reactions = ArticleReaction.query.filter_by(user_id=current_user.id).all()
-        for reaction in reactions:
-            user_reactions[reaction.article_id] = reaction
-    
-    article_stats = {}
-    for article in articles:
-        like_count = ArticleReaction.query.filter_by(
-            article_id=article.id, liked=True
-        ).count()
-        article_stats[article.id] = {"like_count": like_count}
+    if current_user.is_authenticated and articles:
+        rows = db.session.query(ArticleReaction.article_id, ArticleReaction.liked).filter(
+            ArticleReaction.user_id == current_user.id,
+            ArticleReaction.article_id.in_([a.id for a in articles])
+        ).all()
+        user_reactions = {article_id: liked for article_id, liked in rows}
     
     return render_template("articles.html", 
                          articles=articles, 
                          user_reactions=user_reactions,
-                         article_stats=article_stats,
                          current_filter=filter_keyword,
-                         current_search=search_query)
+                         current_search=search_query,
+                         next_before=next_before,
+                         next_before_id=next_before_id)
+
+
+def _build_comment_tree(comments):
+    """Roztriedi chronologicky zoradené komentáre podľa rodiča jedným prechodom a vráti tie najvyššej úrovne.
+    Odpovede sa zapíšu priamo do vzťahu ``replies``, takže šablóna ich nenačítava z databázy pre každý komentár."""
+    children = defaultdict(list)
+    for comment in comments:
+        children[comment.parent_id].append(comment)
+    for comment in comments:
+        set_committed_value(comment, "replies", children.get(comment.id, []))
+    return children[None]
 
 
 @app.get("/discussions")
@@ -394,13 +689,20 @@ def discussions():
     diskusie). Šablóna potom iteruje cez skupiny."""
     # Načíta diskusie, prípadne podľa článku, a spracuje hierarchiu.
     article_id = request.args.get("article_id", type=int)
-    article = Article.query.get_or_404(article_id) if article_id else None
+    article = db.get_or_404(Article, article_id) if article_id else None
+
+    # autor, clanok a komentare (len kvoli poctu) sa nacitaju naraz, nie pre kazdu diskusiu zvlast
+    discussions_query = Discussion.query.options(
+        selectinload(Discussion.author),
+        selectinload(Discussion.article).load_only(Article.id, Article.title),
+        selectinload(Discussion.comments).load_only(DiscussionComment.id),
+    ).order_by(Discussion.date_created.desc())
 
     if article:
-        discussions = Discussion.query.filter_by(article_id=article.id).order_by(Discussion.date_created.desc()).all()
+        discussions = discussions_query.filter_by(article_id=article.id).all()
         return render_template("discussions.html", discussions=discussions, article=article)
 
-    all_discussions = Discussion.query.order_by(Discussion.date_created.desc()).all()
+    all_discussions = discussions_query.all()
     groups = {}
     for d in all_discussions:
         key = d.article  
@@ -433,7 +735,7 @@ def new_discussion():
         
         linked_article = None
         if article_id:
-            linked_article = Article.query.get(article_id)
+            linked_article = db.session.get(Article, article_id)
         
         discussion = Discussion(
             title=title[:200],
@@ -447,14 +749,14 @@ def new_discussion():
         return redirect(url_for("discussion_detail", discussion_id=discussion.id))
     
     article_id = request.args.get("article_id", type=int)
-    article = Article.query.get_or_404(article_id) if article_id else None
+    article = db.get_or_404(Article, article_id) if article_id else None
     return render_template("discussion_new.html", article=article)
 
 @app.post("/discussions/<int:discussion_id>/delete")
 @login_required
 def delete_discussion(discussion_id: int):
     """Odstráni diskusiu. Iba autor alebo admin ju môže zmazať."""
-    discussion = Discussion.query.get_or_404(discussion_id)
+    discussion = db.get_or_404(Discussion, discussion_id)
     if discussion.user_id != current_user.id and not current_user.is_admin:
         flash("You are not allowed to delete that discussion.", "danger")
         return redirect(url_for("discussion_detail", discussion_id=discussion.id))
@@ -467,27 +769,22 @@ def delete_discussion(discussion_id: int):
 @app.get("/discussions/<int:discussion_id>")
 def discussion_detail(discussion_id: int):
     """Zobrazí detail diskusie spolu s komentármi v stromovej štruktúre."""
-    discussion = Discussion.query.get_or_404(discussion_id)
+    discussion = db.get_or_404(Discussion, discussion_id, options=[
+        selectinload(Discussion.author),
+        selectinload(Discussion.article).load_only(Article.id, Article.title),
+    ])
     
     
-    all_comments = DiscussionComment.query.filter_by(
+    all_comments = DiscussionComment.query.options(
+        selectinload(DiscussionComment.author)
+    ).filter_by(
         discussion_id=discussion.id
     ).order_by(DiscussionComment.date_posted.asc()).all()
 
-    comments_dict = {c.id: c for c in all_comments}
-    for c in all_comments:
-        if c.parent_id and c.parent_id in comments_dict:
-            parent = comments_dict[c.parent_id]
-            if not hasattr(parent, '_replies'):
-                parent._replies = []
-            parent._replies.append(c)
-
-    top_level_comments = [c for c in all_comments if c.parent_id is None]
-
     return render_template(
         "discussion_detail.html",
         discussion=discussion,
-        comments=top_level_comments,
+        comments=_build_comment_tree(all_comments),
     )
 
 @app.post("/discussions/<int:discussion_id>/comment")
@@ -497,7 +794,7 @@ def add_discussion_comment(discussion_id: int):
     Podporuje klasické odošlé formuláre aj AJAX JSON volania pre
     inline odpovede. ``parent_id`` môže vytvoriť vnorenú odpoveď.
     """
-    discussion = Discussion.query.get_or_404(discussion_id)
+    discussion = db.get_or_404(Discussion, discussion_id)
 
     
     if request.is_json:
@@ -523,7 +820,7 @@ def add_discussion_comment(discussion_id: int):
     if parent_id:
         try:
             pid = int(parent_id)
-            parent = DiscussionComment.query.get(pid)
+            parent = db.session.get(DiscussionComment, pid)
             if parent and parent.discussion_id == discussion.id:
                 comment.parent = parent
         except (ValueError, TypeError):
@@ -537,103 +834,177 @@ def add_discussion_comment(discussion_id: int):
     flash("Comment added to discussion.", "success")
     return redirect(url_for("discussion_detail", discussion_id=discussion.id))
 
-@app.post("/fetch_article")
-@login_required
-def fetch_article():
-    """Načíta nový článok z viacerých zdrojov a uloží ho do databázy."""
-    multi_source_fetcher = None
-    try:
-        from utils.multi_source_fetcher import MultiSourceNewsFetcher
-        gemini_key = app.config.get("GEMINI_API_KEY", "")#nacitanie gemini kluca
-        multi_source_fetcher = MultiSourceNewsFetcher(gemini_api_key=gemini_key)
-    except Exception as e:
-        print(f"Error importing multi_source_fetcher: {e}")
-        import traceback
-        traceback.print_exc()
-        multi_source_fetcher = None
-    #vsetky nadpisy clankov z databayz
-    existing_titles = [a.title for a in Article.query.with_entities(Article.title).all()]
-    
-    data = None
-    if multi_source_fetcher:
+_fetch_executor = ThreadPoolExecutor(max_workers=2)
+# jeden INSERT pre vsetky ulozenia clanku, skompilovany prikaz sa berie z cache
+_ARTICLE_INSERT = insert(Article.__table__)
+# job_id -> Future pre polling stavu; hotove ulohy sa mazu, ked ich je vela
+_fetch_jobs = {}
+
+
+def _locate_and_store_article(article_id: int, title: str, content: str, summary: str):
+    """Zistí polohu už uloženého článku (Gemini, prípadne geokódovanie cez Nominatim) a zapíše ju dodatočne.
+    Beží ako samostatná úloha na pozadí, aby pomalé HTTP volania nezdržiavali uloženie článku."""
+    with app.app_context():
+        print("Extracting location from article...")
+        location_data = extract_location_with_gemini(title, content, summary)# volaneie extrahcie lokacie
+        
+        if location_data.get("location_name") and not location_data.get("latitude"):#ak nedostaneme suradnice pouuzijeme geokoding
+            print(f"Geocoding location: {location_data['location_name']}")
+            geocode_result = geocode_location(location_data["location_name"])
+            location_data["latitude"] = geocode_result.get("latitude")
+            location_data["longitude"] = geocode_result.get("longitude")
+
+        if not location_data.get("location_name") and location_data.get("latitude") is None:
+            return
+
         try:
-            data = multi_source_fetcher.fetch_multi_source_article(exclude_titles=existing_titles)
-            print(f"Fetched data: {data.get('title') if data else 'None'}")
+            # clanok mohol byt medzitym vymazany pri orezani na 50, vtedy sa nic neaktualizuje
+            updated = Article.query.filter_by(id=article_id).update({
+                "latitude": location_data.get("latitude"),
+                "longitude": location_data.get("longitude"),
+                "location_name": location_data.get("location_name")
+            }, synchronize_session=False)
+            db.session.commit()
         except Exception as e:
-            print(f"Error fetching multi-source article: {e}")
-            import traceback
-            traceback.print_exc()
-            data = None
+            print(f"Error saving article location: {e}")
+            db.session.rollback()
+            return
+        if updated:
+            cache.clear()
+            print(f"Location: {location_data['location_name']} ({location_data.get('latitude')}, {location_data.get('longitude')})")
 
-    if not data:
-        flash("Could not fetch an article right now. Please try again shortly.", "warning")
-        return redirect(url_for("list_articles"))
 
-    #kontrola databazy pre rovnaky clanok?
-    existing = Article.query.filter(Article.title == data['title']).first()
-    
-    if not existing:
+def _fetch_and_store_article(user_id: int):
+    """Načíta nový článok z viacerých zdrojov a uloží ho do databázy, polohu doplní samostatná úloha.
+    Beží vo vlákne na pozadí s vlastným app kontextom a DB session,
+    takže HTTP volania nedržia request worker. Vráti ID uloženého článku alebo None.
+    """
+    with app.app_context():
+        #vsetky nadpisy clankov z databayz
+        try:
+            existing_titles = set(db.session.scalars(db.select(Article.title)))
+        except Exception as e:
+            print(f"Error loading existing titles: {e}")
+            db.session.rollback()
+            return None
+
+        data = None
+        if _fetcher:
+            try:
+                data = _fetcher.fetch_multi_source_article(exclude_titles=existing_titles)
+                print(f"Fetched data: {data.get('title') if data else 'None'}")
+            except Exception as e:
+                print(f"Error fetching multi-source article: {e}")
+                traceback.print_exc()
+                data = None
+
+        if not data:
+            print("Could not fetch an article right now.")
+            return None
+
         try:
             #skratenie textov
-            title = data['title'][:200] if len(data['title']) > 200 else data['title']
-            summary = data.get('summary', '')[:500] if len(data.get('summary', '')) > 500 else data.get('summary', '')
-            source_url = data.get('source_url', '')[:500] if len(data.get('source_url', '')) > 500 else data.get('source_url', '')
-            photo = (data.get('photo') or None)
-            if photo and len(photo) > 500:
-                photo = photo[:500]
-            
-            print("Extracting location from article...")
-            location_data = extract_location_with_gemini(title, data['content'], summary)# volaneie extrahcie lokacie
+            title = data['title'][:200]
+            summary = (data.get('summary') or '')[:500]
+            source_url = (data.get('source_url') or '')[:500] or None
+            photo = (data.get('photo') or '')[:500] or None
             
-            
-            if location_data.get("location_name") and not location_data.get("latitude"):#ak nedostaneme suradnice pouuzijeme geokoding
-                print(f"Geocoding location: {location_data['location_name']}")
-                geocode_result = geocode_location(location_data["location_name"])
-                location_data["latitude"] = geocode_result.get("latitude")
-                location_data["longitude"] = geocode_result.get("longitude")
-            #ukladanie clanku do databazy
-            article = Article(
-                title=title,
-                content=data['content'],  
-                summary=summary,
-                photo=photo,
-                source_url=source_url,
-                author=current_user,
-                date_posted=datetime.now(timezone.utc),
-                latitude=location_data.get("latitude"),
-                longitude=location_data.get("longitude"),
-                location_name=location_data.get("location_name")
-            )
-            db.session.add(article)
-            db.session.commit()
-            print(f"Article saved: {article.id} - {article.title}")
-            if location_data.get("location_name"):
-                print(f"Location: {location_data['location_name']} ({location_data.get('latitude')}, {location_data.get('longitude')})")
-            flash(f"Article '{article.title}' fetched successfully!", "success")
+            # lacna kontrola podla id; unikatny index ix_article_title v starsej databaze s duplicitami chybat moze
+            if db.session.scalar(db.select(Article.id).where(Article.title == title).limit(1)) is not None:
+                print(f"Article already exists: {title}")
+                return None
 
-            
-            ids = [a.id for a in Article.query.order_by(Article.date_posted.desc()).all()]
-            if len(ids) > 50:
-                to_delete = ids[50:]
-                if to_delete:
-                    Article.query.filter(Article.id.in_(to_delete)).delete(synchronize_session=False)
-                    db.session.commit()
+            #ukladanie clanku do databazy, Core INSERT bez unit-of-work
+            try:
+                result = db.session.execute(_ARTICLE_INSERT, dict(
+                    title=title,
+                    content=data['content'],
+                    summary=summary,
+                    photo=photo,
+                    source_url=source_url,
+                    user_id=user_id,
+                    date_posted=datetime.now(timezone.utc)
+                ))
+                db.session.commit()
+            except IntegrityError:
+                # rovnaky nadpis alebo zdroj ulozil medzitym iny proces (unikatne indexy)
+                db.session.rollback()
+                print(f"Article already exists: {title}")
+                return None
+            cache.clear()
+            article_id = result.inserted_primary_key[0]
+            print(f"Article saved: {article_id} - {title}")
+
+            # ponecha sa len 50 najnovsich clankov, jeden DELETE s poddotazom
+            latest_ids = db.select(Article.id).order_by(Article.date_posted.desc()).limit(50)
+            deleted = Article.query.filter(Article.id.notin_(latest_ids)).delete(synchronize_session=False)
+            if deleted:
+                db.session.commit()
+                cache.clear()
+
+            # poloha sa zisti az po ulozeni, clanok je v zozname hned
+            _fetch_executor.submit(_locate_and_store_article, article_id, title, data['content'], summary)
+            return article_id
         except Exception as e:
             print(f"Error saving article: {e}")
-            import traceback
             traceback.print_exc()
             db.session.rollback()
-            flash("Error saving article. Please try again.", "danger")
-    else:
-        flash("This article already exists.", "info")
+            return None
 
+
+@app.post("/fetch_article")
+@login_required
+def fetch_article():
+    """Zaradí načítanie nového článku do fronty na pozadí a hneď odpovie.
+    Klient s ``Accept: application/json`` dostane 202 JSON odpoveď s adresou,
+    na ktorej môže sledovať stav úlohy, namiesto flash správy a presmerovania.
+    """
+    if len(_fetch_jobs) > 100:
+        for done_id in [job_id for job_id, future in _fetch_jobs.items() if future.done()]:
+            _fetch_jobs.pop(done_id, None)
+
+    job_id = uuid.uuid4().hex
+    _fetch_jobs[job_id] = _fetch_executor.submit(_fetch_and_store_article, current_user.id)
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "success": True,
+            "status": "queued",
+            "job_id": job_id,
+            "status_url": url_for("fetch_article_status", job_id=job_id)
+        }), 202
+    flash("Fetching a new article in the background. Refresh the page in a moment.", "info")
     return redirect(url_for("list_articles"))
 
 
+@app.get("/fetch_article/<job_id>")
+@login_required
+def fetch_article_status(job_id: str):
+    """Vráti stav načítavania článku na pozadí, aby klient vedel, kedy obnoviť zoznam."""
+    future = _fetch_jobs.get(job_id)
+    if future is None:
+        return jsonify({"success": False, "error": "Unknown fetch job"}), 404
+    if not future.done():
+        return jsonify({"success": True, "status": "running"})
+
+    # neocakavana chyba ulohy sa klientovi hlasi ako neuspesne nacitanie, nie ako 500
+    article_id = future.result() if future.exception() is None else None
+    return jsonify({
+        "success": True,
+        "status": "done",
+        "article_id": article_id,
+        "url": url_for("article_detail", article_id=article_id) if article_id else None
+    })
+
+
 @app.route("/article/<int:article_id>")
 def article_detail(article_id):
     """Zobrazovanie detailu clanku."""
-    article = Article.query.get_or_404(article_id)
+    # clanok, autor, komentare aj ich autori v jednom selectinload retazci
+    article = db.get_or_404(Article, article_id, options=[
+        selectinload(Article.author),
+        selectinload(Article.comments).selectinload(Comment.author)
+    ])
     
     user_reaction = None
     if current_user.is_authenticated:
@@ -641,31 +1012,12 @@ def article_detail(article_id):
             article_id=article_id, user_id=current_user.id
         ).first()
     
-    like_count = ArticleReaction.query.filter_by(
-        article_id=article_id, liked=True
-    ).count()
-    
-    top_level_comments = Comment.query.filter_by(
-        article_id=article_id, 
-        parent_id=None
-    ).order_by(Comment.date_posted.asc()).all()
-    
-    all_comments = Comment.query.filter_by(article_id=article_id).order_by(Comment.date_posted.asc()).all()
-    
-    comments_dict = {c.id: c for c in all_comments}
-    for comment in all_comments:
-        if comment.parent_id and comment.parent_id in comments_dict:
-            parent = comments_dict[comment.parent_id]
-            if not hasattr(parent, '_replies'):
-                parent._replies = []
-            parent._replies.append(comment)
-    
-    comments = top_level_comments
+    comments = _build_comment_tree(sorted(article.comments, key=attrgetter("date_posted")))
     
     return render_template("article_detail.html",
                          article=article,
                          user_reaction=user_reaction,
-                         like_count=like_count,
+                         like_count=article.like_count,
                          comments=comments)
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+"""add indexes for article listing and like counts
+
+Revision ID: 1c2d3e4f5a6b
+Revises: abc123456789, f0a1b2c3d4e5
+Create Date: 2026-10-16 10:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '1c2d3e4f5a6b'
+down_revision = ('abc123456789', 'f0a1b2c3d4e5')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    op.create_index('ix_article_date_posted_desc', 'article', [sa.text('date_posted DESC')])
+    op.create_index('ix_reaction_article_liked', 'article_reaction', ['article_id', 'liked'])
+    
+
+
+def downgrade():
+    
+    op.drop_index('ix_reaction_article_liked', table_name='article_reaction')
+    op.drop_index('ix_article_date_posted_desc', table_name='article')
+    
@@ -0,0 +1,35 @@
+"""add denormalized like_count to article
+
+Revision ID: 2d3e4f5a6b7c
+Revises: 1c2d3e4f5a6b
+Create Date: 2026-10-16 11:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '2d3e4f5a6b7c'
+down_revision = '1c2d3e4f5a6b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    with op.batch_alter_table('article', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("""
+        UPDATE article SET like_count = (
+            SELECT COUNT(*) FROM article_reaction r
+            WHERE r.article_id = article.id AND r.liked = 1
+        )
+    """)
+    
+
+
+def downgrade():
+    
+    with op.batch_alter_table('article', schema=None) as batch_op:
+        batch_op.drop_column('like_count')
+    
@@ -0,0 +1,32 @@
+"""add unique indexes on article title and source_url
+
+Revision ID: 3e4f5a6b7c8d
+Revises: 2d3e4f5a6b7c
+Create Date: 2026-10-16 12:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '3e4f5a6b7c8d'
+down_revision = '2d3e4f5a6b7c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    op.create_index('ix_article_title', 'article', ['title'], unique=True)
+    op.create_index(
+        'ix_article_source_url', 'article', ['source_url'], unique=True,
+        sqlite_where=sa.text("source_url IS NOT NULL AND source_url != ''"),
+        postgresql_where=sa.text("source_url IS NOT NULL AND source_url != ''"),
+    )
+    
+
+
+def downgrade():
+    
+    op.drop_index('ix_article_source_url', table_name='article')
+    op.drop_index('ix_article_title', table_name='article')
+    
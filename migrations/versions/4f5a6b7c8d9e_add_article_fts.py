@@ -0,0 +1,52 @@
+"""add article_fts full-text index with sync triggers
+
+Revision ID: 4f5a6b7c8d9e
+Revises: 3e4f5a6b7c8d
+Create Date: 2026-10-16 13:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '4f5a6b7c8d9e'
+down_revision = '3e4f5a6b7c8d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    op.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS article_fts USING fts5(
+            title, summary, content, content='article', content_rowid='id', tokenize='unicode61'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_fts_ai AFTER INSERT ON article BEGIN
+            INSERT INTO article_fts(rowid, title, summary, content) VALUES (new.id, new.title, new.summary, new.content);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_fts_ad AFTER DELETE ON article BEGIN
+            INSERT INTO article_fts(article_fts, rowid, title, summary, content)
+            VALUES ('delete', old.id, old.title, old.summary, old.content);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_fts_au AFTER UPDATE OF title, summary, content ON article BEGIN
+            INSERT INTO article_fts(article_fts, rowid, title, summary, content)
+            VALUES ('delete', old.id, old.title, old.summary, old.content);
+            INSERT INTO article_fts(rowid, title, summary, content) VALUES (new.id, new.title, new.summary, new.content);
+        END
+    """)
+    op.execute("INSERT INTO article_fts(article_fts) VALUES('rebuild')")
+    
+
+
+def downgrade():
+    
+    op.execute("DROP TRIGGER IF EXISTS article_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS article_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS article_fts_ai")
+    op.execute("DROP TABLE IF EXISTS article_fts")
+    
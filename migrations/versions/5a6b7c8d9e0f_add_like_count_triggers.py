@@ -0,0 +1,52 @@
+"""maintain article.like_count with triggers on article_reaction
+
+Revision ID: 5a6b7c8d9e0f
+Revises: 4f5a6b7c8d9e
+Create Date: 2026-10-16 14:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5a6b7c8d9e0f'
+down_revision = '4f5a6b7c8d9e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_reaction_like_ai AFTER INSERT ON article_reaction
+        WHEN NEW.liked = 1 BEGIN
+            UPDATE article SET like_count = like_count + 1 WHERE id = NEW.article_id;
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_reaction_like_ad AFTER DELETE ON article_reaction
+        WHEN OLD.liked = 1 BEGIN
+            UPDATE article SET like_count = like_count - 1 WHERE id = OLD.article_id;
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER IF NOT EXISTS article_reaction_like_au AFTER UPDATE OF liked ON article_reaction
+        WHEN NEW.liked != OLD.liked BEGIN
+            UPDATE article SET like_count = like_count + (CASE WHEN NEW.liked = 1 THEN 1 ELSE -1 END)
+            WHERE id = NEW.article_id;
+        END
+    """)
+    op.execute("""
+        UPDATE article SET like_count = (
+            SELECT COUNT(*) FROM article_reaction r
+            WHERE r.article_id = article.id AND r.liked = 1
+        )
+    """)
+    
+
+
+def downgrade():
+    
+    op.execute("DROP TRIGGER IF EXISTS article_reaction_like_au")
+    op.execute("DROP TRIGGER IF EXISTS article_reaction_like_ad")
+    op.execute("DROP TRIGGER IF EXISTS article_reaction_like_ai")
+    
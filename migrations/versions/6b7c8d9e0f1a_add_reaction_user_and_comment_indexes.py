@@ -0,0 +1,29 @@
+"""add per-user reaction and per-article comment indexes
+
+Revision ID: 6b7c8d9e0f1a
+Revises: 5a6b7c8d9e0f
+Create Date: 2026-10-16 15:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '6b7c8d9e0f1a'
+down_revision = '5a6b7c8d9e0f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    op.create_index('ix_ar_user_article', 'article_reaction', ['user_id', 'article_id'])
+    op.create_index('ix_comment_article_date', 'comment', ['article_id', 'date_posted'])
+    op.execute("ANALYZE")
+    
+
+
+def downgrade():
+    
+    op.drop_index('ix_comment_article_date', table_name='comment')
+    op.drop_index('ix_ar_user_article', table_name='article_reaction')
+    
@@ -0,0 +1,49 @@
+"""add precomputed preview to article
+
+Revision ID: 7c8d9e0f1a2b
+Revises: 6b7c8d9e0f1a
+Create Date: 2026-10-16 16:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+
+
+revision = '7c8d9e0f1a2b'
+down_revision = '6b7c8d9e0f1a'
+branch_labels = None
+depends_on = None
+
+
+def _build_preview(summary, content):
+    preview_text = summary or ""
+    if not preview_text:
+        try:
+            data = json.loads(content)
+        except (json.JSONDecodeError, TypeError):
+            data = None
+        if isinstance(data, dict) and data.get('bullets'):
+            preview_text = data['bullets'][0][:200]
+    return preview_text[:200] + "..." if len(preview_text) > 200 else preview_text
+
+
+def upgrade():
+    
+    with op.batch_alter_table('article', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('preview', sa.String(length=203), nullable=True))
+
+    conn = op.get_bind()
+    rows = conn.execute(sa.text("SELECT id, summary, content FROM article")).fetchall()
+    if rows:
+        conn.execute(
+            sa.text("UPDATE article SET preview = :preview WHERE id = :id"),
+            [{"id": row[0], "preview": _build_preview(row[1], row[2])} for row in rows]
+        )
+    
+
+
+def downgrade():
+    
+    with op.batch_alter_table('article', schema=None) as batch_op:
+        batch_op.drop_column('preview')
+    
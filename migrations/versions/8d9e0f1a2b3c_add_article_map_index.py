@@ -0,0 +1,30 @@
+"""add partial index for articles shown on the map
+
+Revision ID: 8d9e0f1a2b3c
+Revises: 7c8d9e0f1a2b
+Create Date: 2026-10-16 17:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '8d9e0f1a2b3c'
+down_revision = '7c8d9e0f1a2b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    
+    op.create_index(
+        'ix_article_map', 'article', [sa.text('date_posted DESC')],
+        sqlite_where=sa.text("latitude IS NOT NULL AND longitude IS NOT NULL"),
+        postgresql_where=sa.text("latitude IS NOT NULL AND longitude IS NOT NULL"),
+    )
+    
+
+
+def downgrade():
+    
+    op.drop_index('ix_article_map', table_name='article')
+    
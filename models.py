@@ -1,12 +1,22 @@
 from datetime import datetime
 import hashlib
+import json
+from functools import lru_cache
+import traceback
 from flask_login import UserMixin
 from flask import url_for
+from sqlalchemy import event, inspect
 from extensions import db, bcrypt, login_manager
 
+@lru_cache(maxsize=4096)
+def _md5_hex(text: str) -> str:
+    """MD5 hash textu pre seed placeholder obrazkov; vysledok sa pamata, zoznamy vykresluju tie iste clanky opakovane."""
+    return hashlib.md5(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
 @login_manager.user_loader
 def load_user(user_id: str):
-    return User.query.get(int(user_id))
+    return db.session.get(User, int(user_id))
 
 class User(db.Model, UserMixin):
     id = db.Column(db.Integer, primary_key=True)
@@ -18,7 +28,10 @@ class User(db.Model, UserMixin):
     date_created = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     profile_image = db.Column(db.String(500))
 
-    articles = db.relationship("Article", backref="author", lazy=True)
+    articles = db.relationship("Article", back_populates="author", lazy=True)
+    comments = db.relationship("Comment", back_populates="author", lazy=True)
+    discussions = db.relationship("Discussion", back_populates="author", lazy=True)
+    discussion_comments = db.relationship("DiscussionComment", back_populates="author", lazy=True)
 
     def set_password(self, password: str) -> None:
         self.password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
@@ -41,8 +54,8 @@ class User(db.Model, UserMixin):
             
             user = User.query.filter_by(email=email).first()
             if user:
-                existing_google_user = User.query.filter_by(google_id=google_id).first()
-                if existing_google_user and existing_google_user.id != user.id:
+                existing_google_user_id = db.session.scalar(db.select(User.id).where(User.google_id == google_id))
+                if existing_google_user_id is not None and existing_google_user_id != user.id:
                     raise ValueError(f"Google ID {google_id} is already linked to another account")
                 
                 user.google_id = google_id
@@ -60,7 +73,8 @@ class User(db.Model, UserMixin):
             
             base_username = username
             counter = 1
-            while User.query.filter_by(username=username).first():
+            # staci zistit, ci meno existuje; riadok pouzivatela sa nenacitava
+            while db.session.scalar(db.select(db.exists().where(User.username == username))):
                 username = f"{base_username}_{counter}"[:80]
                 counter += 1
                 if counter > 1000:  
@@ -80,7 +94,6 @@ class User(db.Model, UserMixin):
         except Exception as e:
             db.session.rollback()
             print(f"Error in create_google_user: {type(e).__name__}: {str(e)}")
-            import traceback
             traceback.print_exc()
             raise
 
@@ -90,11 +103,16 @@ class User(db.Model, UserMixin):
             if self.profile_image.startswith("http"):
                 return self.profile_image
             return url_for("static", filename=self.profile_image)
-        seed_source = (self.email or self.username or "user").encode("utf-8", errors="ignore")
-        seed = hashlib.md5(seed_source).hexdigest()
+        seed = _md5_hex(self.email or self.username or "user")
         return f"https://api.dicebear.com/7.x/initials/svg?seed={seed}&radius=50&scale=110&size={size}"
 
 
+def _default_preview(context) -> str:
+    """Predvolená hodnota stĺpca preview pri INSERT (ORM aj Core) zo zhrnutia a obsahu vkladaného riadku."""
+    params = context.get_current_parameters()
+    return Article.build_preview(params.get("summary"), params.get("content"))
+
+
 class Article(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -108,13 +126,32 @@ class Article(db.Model):
     latitude = db.Column(db.Float, nullable=True)
     longitude = db.Column(db.Float, nullable=True)
     location_name = db.Column(db.String(200), nullable=True)  
+
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    preview = db.Column(db.String(203), nullable=True, default=_default_preview)
     
-    reactions = db.relationship("ArticleReaction", backref="article", lazy=True, cascade="all, delete-orphan")
+    author = db.relationship("User", back_populates="articles", lazy=True)
+    reactions = db.relationship("ArticleReaction", back_populates="article", lazy=True, cascade="all, delete-orphan")
     comments = db.relationship("Comment", back_populates="article", lazy=True, cascade="all, delete-orphan")
+    discussions = db.relationship("Discussion", back_populates="article", lazy=True)
+
+    __table_args__ = (
+        db.Index('ix_article_date_posted_desc', date_posted.desc()),
+        db.Index('ix_article_title', 'title', unique=True),
+        db.Index(
+            'ix_article_source_url', 'source_url', unique=True,
+            sqlite_where=db.text("source_url IS NOT NULL AND source_url != ''"),
+            postgresql_where=db.text("source_url IS NOT NULL AND source_url != ''"),
+        ),
+        db.Index(
+            'ix_article_map', date_posted.desc(),
+            sqlite_where=db.text("latitude IS NOT NULL AND longitude IS NOT NULL"),
+            postgresql_where=db.text("latitude IS NOT NULL AND longitude IS NOT NULL"),
+        ),
+    )
     
     def _placeholder_seed(self) -> str:
-        base = (self.title or str(self.id) or "news").encode("utf-8", errors="ignore")
-        return hashlib.md5(base).hexdigest()[:16]
+        return _md5_hex(self.title or str(self.id) or "news")[:16]
 
     def placeholder_image_url(self, width: int = 800, height: int = 450) -> str:
         seed = self._placeholder_seed()
@@ -128,9 +165,28 @@ class Article(db.Model):
 
     def get_sources(self):
         """Parsuje zdroje z obsahu článku, ak ide o multi-source formát, Skúsi dekódovať JSON z obsahu a vráti údaje o zdrojoch."""
-        import json
+        # vysledok sa pamata na instancii, kym sa nezmeni obsah clanku
+        cached = getattr(self, "_sources_cache", None)
+        if cached is None or cached[0] is not self.content:
+            cached = (self.content, Article.parse_sources(self.content))
+            self._sources_cache = cached
+        return cached[1]
+
+    @staticmethod
+    def build_preview(summary, content) -> str:
+        """Zostaví krátky náhľad článku (max. 200 znakov) zo zhrnutia alebo prvého bodu multi-source obsahu."""
+        preview_text = summary or ""
+        if not preview_text:
+            sources_data = Article.parse_sources(content)
+            if sources_data and 'bullets' in sources_data:
+                preview_text = sources_data['bullets'][0][:200] if sources_data['bullets'] else ""
+        return preview_text[:200] + "..." if len(preview_text) > 200 else preview_text
+
+    @staticmethod
+    def parse_sources(content):
+        """Dekóduje multi-source JSON z daného obsahu bez potreby načítaného článku, inak vráti None."""
         try:
-            data = json.loads(self.content)
+            data = json.loads(content)
             if isinstance(data, dict) and 'bullets' in data:
                 return data
             elif isinstance(data, list) and all(isinstance(s, dict) and 'source' in s for s in data):
@@ -139,6 +195,16 @@ class Article(db.Model):
             pass
         return None
 
+@event.listens_for(Article, "before_update")
+def _refresh_article_preview(mapper, connection, target):
+    """Po zmene zhrnutia alebo obsahu článku prepočíta uložený náhľad."""
+    state = inspect(target)
+    if state.attrs.summary.history.has_changes() or state.attrs.content.history.has_changes():
+        # obsah je potrebny len vtedy, ked clanok nema zhrnutie
+        summary = target.summary
+        target.preview = Article.build_preview(summary, None if summary else target.content)
+
+
 class ArticleReaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     article_id = db.Column(db.Integer, db.ForeignKey("article.id"), nullable=False)
@@ -146,7 +212,13 @@ class ArticleReaction(db.Model):
     liked = db.Column(db.Boolean, default=False, nullable=False)
     date_reacted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('article_id', 'user_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('article_id', 'user_id'),
+        db.Index('ix_reaction_article_liked', 'article_id', 'liked'),
+        db.Index('ix_ar_user_article', 'user_id', 'article_id'),
+    )
+
+    article = db.relationship("Article", back_populates="reactions", lazy=True)
 
 class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -157,8 +229,13 @@ class Comment(db.Model):
     parent_id = db.Column(db.Integer, db.ForeignKey("comment.id"), nullable=True)  
     
     article = db.relationship("Article", back_populates="comments", lazy=True)
-    author = db.relationship("User", backref="comments", lazy=True)
-    parent = db.relationship("Comment", remote_side=[id], backref="replies")
+    author = db.relationship("User", back_populates="comments", lazy=True)
+    parent = db.relationship("Comment", remote_side=[id], back_populates="replies")
+    replies = db.relationship("Comment", back_populates="parent")
+
+    __table_args__ = (
+        db.Index('ix_comment_article_date', 'article_id', 'date_posted'),
+    )
     
     def get_reply_chain(self):
         """Získa reťazec používateľských mien, na ktoré tento komentár odpovedá, Prejde predchádzajúce odpovede a zoberie mená autorov."""
@@ -179,9 +256,9 @@ class Discussion(db.Model):
     article_id = db.Column(db.Integer, db.ForeignKey("article.id"), nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
     
-    article = db.relationship("Article", backref="discussions", lazy=True)
-    author = db.relationship("User", backref="discussions", lazy=True)
-    comments = db.relationship("DiscussionComment", backref="discussion", lazy=True, cascade="all, delete-orphan")
+    article = db.relationship("Article", back_populates="discussions", lazy=True)
+    author = db.relationship("User", back_populates="discussions", lazy=True)
+    comments = db.relationship("DiscussionComment", back_populates="discussion", lazy=True, cascade="all, delete-orphan")
 
 class DiscussionComment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -191,8 +268,10 @@ class DiscussionComment(db.Model):
     date_posted = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     parent_id = db.Column(db.Integer, db.ForeignKey("discussion_comment.id"), nullable=True)
     
-    author = db.relationship("User", backref="discussion_comments", lazy=True)
-    parent = db.relationship("DiscussionComment", remote_side=[id], backref="replies")
+    discussion = db.relationship("Discussion", back_populates="comments", lazy=True)
+    author = db.relationship("User", back_populates="discussion_comments", lazy=True)
+    parent = db.relationship("DiscussionComment", remote_side=[id], back_populates="replies")
+    replies = db.relationship("DiscussionComment", back_populates="parent")
 
     def get_reply_chain(self):
         chain = []
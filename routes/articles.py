@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from extensions import db
 from models import Article, ArticleReaction, Comment
+from sqlalchemy.orm import load_only
 from datetime import datetime
 
 articles_bp = Blueprint("articles_bp", __name__)
@@ -12,7 +13,8 @@ articles_bp = Blueprint("articles_bp", __name__)
 def toggle_like(article_id):
     """Prepne like/odlike pre aktuálneho používateľa na článku."""
     # Uloží alebo aktualizuje reakciu používateľa na článok.
-    article = Article.query.get_or_404(article_id)
+    # staci overit, ze clanok existuje; obsah clanku sa nenacitava
+    db.get_or_404(Article, article_id, options=[load_only(Article.id)])
     
     
     reaction = ArticleReaction.query.filter_by(
@@ -31,12 +33,9 @@ def toggle_like(article_id):
         )
         db.session.add(reaction)
     
+    # article.like_count upravi databazovy trigger nad article_reaction
     db.session.commit()
-    
-    
-    like_count = ArticleReaction.query.filter_by(
-        article_id=article_id, liked=True
-    ).count()
+    like_count = db.session.scalar(db.select(Article.like_count).where(Article.id == article_id))
     
     return jsonify({
         "success": True,
@@ -50,7 +49,8 @@ def toggle_like(article_id):
 @login_required
 def add_comment(article_id):
     """Pridá komentár k článku, Uloží komentár do databázy a vráti JSON odpoveď."""
-    article = Article.query.get_or_404(article_id)
+    # staci overit, ze clanok existuje
+    db.get_or_404(Article, article_id, options=[load_only(Article.id)])
     content = request.json.get("content", "").strip()
     parent_id = request.json.get("parent_id", None)
     
@@ -59,7 +59,7 @@ def add_comment(article_id):
     
     
     if parent_id:
-        parent_comment = Comment.query.get(parent_id)
+        parent_comment = db.session.get(Comment, parent_id)
         if not parent_comment or parent_comment.article_id != article_id:
             return jsonify({"success": False, "error": "Invalid parent comment"}), 400
     
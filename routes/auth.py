@@ -1,9 +1,11 @@
 import os
+import traceback
 import uuid
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from authlib.integrations.flask_client import OAuth
+from sqlalchemy.exc import IntegrityError
 from extensions import db
 from models import User, Comment
 
@@ -52,14 +54,16 @@ def register():
             flash("Passwords do not match.", "danger")
             return render_template("auth/register.html")
 
-        if User.query.filter((User.username == username) | (User.email == email)).first():
-            flash("Username or email already registered.", "warning")
-            return render_template("auth/register.html")
-
+        # duplicitu mena/e-mailu odhali unikatne obmedzenie, netreba predbezny SELECT
         user = User(username=username, email=email)
         user.set_password(password)
         db.session.add(user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash("Username or email already registered.", "warning")
+            return render_template("auth/register.html")
         flash("Registration successful. You can now log in.", "success")
         return redirect(url_for("auth.login"))
     return render_template("auth/register.html", google_enabled=bool(current_app.config.get("GOOGLE_CLIENT_ID")))
@@ -144,7 +148,6 @@ def google_callback():
                     print(f"Failed to fetch userinfo: status {resp.status_code if resp else 'None'}")
             except Exception as api_error:
                 print(f"Error fetching userinfo from API: {api_error}")
-                import traceback
                 traceback.print_exc()
         
         if not user_info:
@@ -184,7 +187,6 @@ def google_callback():
             return redirect(url_for("list_articles"))
         except Exception as db_error:
             print(f"Database error: {type(db_error).__name__}: {str(db_error)}")
-            import traceback
             traceback.print_exc()
             error_msg = str(db_error)
             if "UNIQUE constraint" in error_msg or "unique" in error_msg.lower():
@@ -194,7 +196,6 @@ def google_callback():
             return redirect(url_for("auth.login"))
         
     except Exception as e:
-        import traceback
         print(f"Google OAuth error: {e}")
         print(f"Error type: {type(e).__name__}")
         traceback.print_exc()
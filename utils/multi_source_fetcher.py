@@ -5,12 +5,18 @@ import feedparser
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, List, Optional
 from collections import Counter
 import re
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
 import json
 import os
+import traceback
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
 
 
 class MultiSourceNewsFetcher:
@@ -52,6 +58,7 @@ class MultiSourceNewsFetcher:
             'Cache-Control': 'max-age=0'
         })
         self.gemini_api_key = gemini_api_key or os.getenv("GEMINI_API_KEY", "")
+        self._gemini_model = None
     
     def fetch_all_feeds(self) -> List[Dict]:
         """Načíta články zo všetkých RSS kanálov do zoznamu."""
@@ -184,7 +191,6 @@ class MultiSourceNewsFetcher:
             return 'https:' + url
         
         if base_url:
-            from urllib.parse import urljoin
             return urljoin(base_url, url)
         
         return url
@@ -332,7 +338,7 @@ class MultiSourceNewsFetcher:
         try:
             soup = BeautifulSoup(content, 'html.parser')#Extrauje iba text bez HTML tagov
             content = soup.get_text()
-        except:
+        except Exception:
             pass
         
         content = ' '.join(content.split()) #Odstrani zbytocne medzery, tabulatory, nove riadky
@@ -359,56 +365,26 @@ class MultiSourceNewsFetcher:
                 summary = content[:max_length] + "..."
         return summary.strip()#Vrati ocistene zhrnutie bez mezer na zaciatku a konci
     
+    def _get_gemini_model(self):
+        """Vráti Gemini model pre generovanie bodov, pri prvom volaní nakonfiguruje API a vytvorí ho.
+        Vytvorenie modelu nerobí sieťové volanie, preto sa model nevyberá pri každom článku znova."""
+        if self._gemini_model is None:
+            genai.configure(api_key=self.gemini_api_key)
+            model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+            self._gemini_model = genai.GenerativeModel(model_name)
+            print(f"✓ Successfully initialized {model_name} model")
+        return self._gemini_model
+
     def _generate_bullets_with_gemini(self, source_summaries: List[Dict], title: str) -> List[str]:
         """Vygeneruje zoznam bodov o článku pomocou Gemini API."""
         if not self.gemini_api_key:
             print("Gemini API key not found, falling back to basic extraction")
             return []
+        if genai is None:
+            print("google-generativeai is not installed, falling back to basic extraction")
+            return []
         try:
-            import google.generativeai as genai
-            genai.configure(api_key=self.gemini_api_key)
-            try:
-                models = genai.list_models()
-                available_models = []
-                for m in models:
-                    if 'generateContent' in m.supported_generation_methods:
-                        
-                        model_name = m.name.replace('models/', '') if m.name.startswith('models/') else m.name
-                        available_models.append(model_name)
-                print(f"Available Gemini models: {available_models[:10]}")  
-                if available_models:
-                    
-                    preferred_models = ['gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro']
-                    for pref in preferred_models:
-                        if any(pref in m for m in available_models):
-                            print(f"Found preferred model: {pref}")
-            except Exception as list_error:
-                print(f"Could not list models: {list_error}")
-            
-            model = None
-            model_name = None
-            
-            preferred_models = [
-                'gemini-2.5-flash',      
-                'gemini-2.0-flash',      
-                'gemini-2.5-pro',        
-                'gemini-1.5-flash',      
-                'gemini-1.5-pro',        
-                'gemini-pro'              
-            ]
-            
-            for model_name in preferred_models:
-                try:
-                    model = genai.GenerativeModel(model_name)
-                    print(f"✓ Successfully initialized {model_name} model")
-                    break
-                except Exception as e:
-                    print(f"X Failed to initialize {model_name}: {e}")
-                    continue
-            
-            if model is None:
-                print("X Could not initialize any Gemini model")
-                return []
+            model = self._get_gemini_model()
             
             sources_text = ""
             for i, source in enumerate(source_summaries, 1):
@@ -483,7 +459,6 @@ Bullet points:"""
                 
         except Exception as e:
             print(f"X Error using Gemini API: {e}")
-            import traceback
             traceback.print_exc()
             return []
     
@@ -593,7 +568,7 @@ Bullet points:"""
         
         return groups
     
-    def analyze_available_stories(self, exclude_titles: List[str] = None) -> List[Dict]:
+    def analyze_available_stories(self, exclude_titles: Iterable[str] = None) -> List[Dict]:
         """Prvá fáza: analyzuje, ktoré príbehy pokrýva viacero zdrojov."""
         if exclude_titles is None:
             exclude_titles = []
@@ -647,7 +622,7 @@ Bullet points:"""
         print(f"\nPhase 1 complete: Found {len(available_stories)} new stories covered by multiple sources")
         return available_stories
     
-    def fetch_multi_source_article(self, exclude_titles: List[str] = None) -> Optional[Dict]:
+    def fetch_multi_source_article(self, exclude_titles: Iterable[str] = None) -> Optional[Dict]:
         """Finalna funkcia ktora pozbiera clanky, zoskupi ich, zosummarizuje ich, vyberie nejlepsi, vytvori bullet pointy"""
         if exclude_titles is None:
             exclude_titles = []